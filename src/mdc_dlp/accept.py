@@ -1,32 +1,116 @@
-import sys, re, json, urllib.parse, requests
+import sys, re, json, urllib.parse, bisect, requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+
+# RE2 guarantees linear-time matching, which matters because the chunk scans
+# run over attacker-controllable JS bundles; it is also faster on scans that
+# reduce to finding a rare literal. Optional — stdlib re is the fallback.
+try:
+    import re2 as _rx  # pip install google-re2
+except ImportError:
+    _rx = re
+
+# Aho-Corasick automaton for the context-word scan: finds every needle in one
+# pass over the chunk instead of one substring scan per word. Optional — the
+# fused regex below is the fallback (also used if the installed build of
+# pyahocorasick was not compiled with bytes support).
+# Hyperscan compiles the id pattern and the context literals into one SIMD
+# automaton, turning the multi-MB chunk walk into a single linear block scan.
+# Optional; the automaton/regex paths below remain the fallback.
+try:
+    import hyperscan
+
+    _HS_EXPRESSIONS = [rb"[a-f0-9]{40,64}", rb"action", rb"next", rb"server", rb"\$ACTION"]
+    _HS_DB = hyperscan.Database()
+    _HS_DB.compile(
+        expressions=_HS_EXPRESSIONS,
+        ids=list(range(len(_HS_EXPRESSIONS))),
+        flags=[hyperscan.HS_FLAG_SOM_LEFTMOST] * len(_HS_EXPRESSIONS),
+    )
+except Exception:  # import error or unsupported hardware/pattern set
+    _HS_DB = None
+
+try:
+    import ahocorasick
+
+    _CONTEXT_AUTOMATON = ahocorasick.Automaton()
+    for _w in (b"action", b"next", b"server", b"$ACTION"):
+        _CONTEXT_AUTOMATON.add_word(_w, _w)
+    _CONTEXT_AUTOMATON.make_automaton()
+except (ImportError, TypeError):
+    _CONTEXT_AUTOMATON = None
 
 BASE_URL = "https://datacollective.mozillafoundation.org"
 
+# Chunks above this size are skipped during action-id discovery unless they are
+# the dataset page chunk itself; vendored bundles this large never hold the id.
+CHUNK_SCAN_MAX_BYTES = 4 << 20
+
 # ---------- Parsers ----------
-RSC_CHUNK_RE = re.compile(r'self\.__next_f\.push\(\[1,"(.*?)"\]\)', re.DOTALL)
-TERMS_BLOCK_RE = re.compile(r'"terms"\s*:\s*\{(.*?)\}\s*,\s*"hasAgreed"', re.DOTALL)
-TERMS_ID_RE = re.compile(r'"id"\s*:\s*"([^"]+)"')
-LOCALIZATION_IDS_RE = re.compile(r'"localizationId"\s*:\s*"([^"]+)"')
-DATASET_ID_IN_TERMS_RE = re.compile(r'"dataset"\s*:\s*\{[^}]*"id"\s*:\s*"([^"]+)"', re.DOTALL)
+# All patterns are compiled once at import time and operate on bytes, so we can
+# scan raw response bodies (resp.content) without a full UTF-8 decode of
+# multi-MB HTML/JS payloads. Only the small surviving matches are decoded.
+# The _rx patterns use inline (?s)/(?i) flags: google-re2's compile() takes an
+# re2.Options object, not stdlib flag constants, so passing re.DOTALL/re.I
+# would crash at import whenever re2 is installed.
+RSC_CHUNK_RE = _rx.compile(rb'(?s)self\.__next_f\.push\(\[1,"(.*?)"\]\)')
+TERMS_BLOCK_RE = re.compile(rb'"terms"\s*:\s*\{(.*?)\}\s*,\s*"hasAgreed"', re.DOTALL)
+TERMS_ID_RE = re.compile(rb'"id"\s*:\s*"([^"]+)"')
+LOCALIZATION_IDS_RE = re.compile(rb'"localizationId"\s*:\s*"([^"]+)"')
+DATASET_ID_IN_TERMS_RE = re.compile(rb'"dataset"\s*:\s*\{[^}]*"id"\s*:\s*"([^"]+)"', re.DOTALL)
 
 # script tags and the specific dataset page chunk
-SCRIPT_SRC_RE = re.compile(r'<script[^>]+src="(/_next/static/chunks/[^"]+\.js)"', re.I)
-DATASET_PAGE_CHUNK_RE = re.compile(r'/_next/static/chunks/app/datasets/%5BdatasetId%5D/page-[^"]+\.js', re.I)
+SCRIPT_SRC_RE = _rx.compile(rb'(?i)<script[^>]+src="(/_next/static/chunks/[^"]+\.js)"')
+DATASET_PAGE_CHUNK_RE = _rx.compile(rb'(?i)/_next/static/chunks/app/datasets/%5BdatasetId%5D/page-[^"]+\.js')
 
 # Next action ids are 40-64 lowercase hex
-ACTION_ID_RE = re.compile(r'\b[a-f0-9]{40,64}\b')
+ACTION_ID_RE = _rx.compile(rb'\b[a-f0-9]{40,64}\b')
+# Fused scan: a hex id only counts when one of the context words appears within
+# ~400 bytes on the same line, in either order. One pass in the C regex engine
+# replaces the Python-level line loop with its repeated substring scans.
+_CONTEXT_ID_RE = _rx.compile(
+    rb'(?:action|next|server)[^\n]{0,400}?\b([a-f0-9]{40,64})\b'
+    rb'|\b([a-f0-9]{40,64})\b[^\n]{0,400}?(?:action|next|server)'
+)
+# Full-string validator for candidate ids; compiled once so the hot dedupe and
+# POST loops don't pay the re-module cache lookup on every call. Kept on
+# stdlib re — re2 has no fullmatch and the inputs here are tiny.
+_ACTION_ID_FULL_RE = re.compile(rb'[a-f0-9]{40,64}')
+
+# \uXXXX escapes inside RSC chunks; everything else the old unicode_escape
+# round-trip handled is irrelevant to extracting the terms block
+_U_ESC_RE = re.compile(rb'\\u([0-9a-fA-F]{4})')
 
-def _unescape(s: str) -> str:
-    return s.encode("utf-8", "ignore").decode("unicode_escape", "ignore").replace("\\/", "/")
+def _unescape(s: bytes) -> bytes:
+    # Targeted replacements instead of a full unicode_escape round-trip: the
+    # only escapes that matter here are \" \\ \/ and \uXXXX, and the codec
+    # pass forced two extra full copies per chunk.
+    s = s.replace(b'\\"', b'"').replace(b"\\\\", b"\\").replace(b"\\/", b"/")
+    # surrogatepass: astral characters (emoji in dataset names) arrive as
+    # surrogate-pair escapes, which strict UTF-8 refuses to encode; the
+    # byte-level scans downstream only care about the ASCII structure, so
+    # encoding each half as-is is fine
+    return _U_ESC_RE.sub(
+        lambda m: chr(int(m.group(1), 16)).encode("utf-8", "surrogatepass"), s
+    )
 
-def extract_terms_info_from_html(html: str):
+def extract_terms_info_from_html(html: bytes):
     """
     Returns (terms_id, localization_ids[], dataset_id_from_terms or None)
     """
-    m = TERMS_BLOCK_RE.search(html)
-    candidates = [m.group(1)] if m else []
+    # Substring prefilters: a find() costs one memmem pass, far cheaper than
+    # running the DOTALL automaton over a document that has no terms block.
+    candidates = []
+    pos = html.find(b'"terms"')
+    if pos != -1:
+        m = TERMS_BLOCK_RE.search(html, pos)
+        if m:
+            candidates.append(m.group(1))
     for cm in RSC_CHUNK_RE.finditer(html):
-        chunk = _unescape(cm.group(1))
+        raw = cm.group(1)
+        if b"terms" not in raw:
+            continue
+        chunk = _unescape(raw)
         tm = TERMS_BLOCK_RE.search(chunk)
         if tm:
             candidates.append(tm.group(1))
@@ -35,7 +119,11 @@ def extract_terms_info_from_html(html: str):
         locs = LOCALIZATION_IDS_RE.findall(blob)
         did = DATASET_ID_IN_TERMS_RE.search(blob)
         if tid:
-            return tid.group(1), list(dict.fromkeys(locs)), (did.group(1) if did else None)
+            return (
+                tid.group(1).decode(),
+                [x.decode() for x in dict.fromkeys(locs)],
+                (did.group(1).decode() if did else None),
+            )
     return None, [], None
 
 def json_or_text(resp: requests.Response):
@@ -44,25 +132,124 @@ def json_or_text(resp: requests.Response):
     except Exception:
         return resp.text[:800]
 
-def build_next_router_state_tree(dataset_id: str) -> str:
-    tree = ["", {
+# The router state tree is static except for the dataset id, so serialize and
+# percent-encode it once at import and substitute the (quoted) id per call
+_TREE_TEMPLATE = urllib.parse.quote(
+    json.dumps(["", {
         "children": ["datasets", {
             "children": [
-                ["datasetId", dataset_id, "d"],
+                ["datasetId", "__DID__", "d"],
                 {"children": ["__PAGE__", {}, None, None]},
                 None, None
             ]
         }, None, None]
-    }, None, None, True]
-    raw = json.dumps(tree, separators=(",", ":"))
-    return urllib.parse.quote(raw, safe="")
+    }, None, None, True], separators=(",", ":")),
+    safe="",
+).replace("__DID__", "{}")
 
-def _get(s: requests.Session, url: str):
-    r = s.get(url, timeout=30)
+def build_next_router_state_tree(dataset_id: str) -> str:
+    # json.dumps(...)[1:-1] applies the same string escaping the id would get
+    # inside the full document (ids are plain [a-z0-9], so this is a no-op
+    # pass, kept for exactness)
+    escaped = json.dumps(dataset_id)[1:-1]
+    return _TREE_TEMPLATE.format(urllib.parse.quote(escaped, safe=""))
+
+def _get(s: requests.Session, url: str, stream: bool = False):
+    r = s.get(url, timeout=30, stream=stream)
     r.encoding = r.encoding or "utf-8"
     return r
 
-def discover_action_ids_for_dataset(session: requests.Session, page_html: str) -> list[str]:
+def _stream_page(s: requests.Session, url: str):
+    """
+    Stream the page body instead of materializing it up front. Scans a rolling
+    ~256 KB tail window for the terms block as chunks arrive, so the terms id
+    is available after the first window that carries it rather than after the
+    whole page downloads. Returns (response, full_html, early_terms) where
+    early_terms is an extract_terms_info_from_html() result or None.
+    """
+    r = _get(s, url, stream=True)
+    parts = []
+    tail = b""
+    early = None
+    for chunk in r.iter_content(chunk_size=65536):
+        if not chunk:
+            continue
+        parts.append(chunk)
+        if early is None:
+            tail = (tail + chunk)[-(256 << 10):]
+            if b'"terms"' in tail:
+                info = extract_terms_info_from_html(tail)
+                if info[0]:
+                    early = info
+    return r, b"".join(parts), early
+
+def _scan_chunk_for_ids(body: bytes) -> list[bytes]:
+    """
+    Collect candidate action ids that appear near a context word. With
+    pyahocorasick available, one automaton pass finds all context-word hits
+    and only the +/-400 byte windows around them are handed to the id regex;
+    otherwise the fused context regex scans the whole buffer. With hyperscan
+    available, both the ids and the context words come out of a single SIMD
+    block scan instead.
+    """
+    if _HS_DB is not None:
+        id_starts = set()
+        context_offsets = []
+
+        def _on_match(pat_id, start, end, flags, ctx):
+            if pat_id == 0:
+                id_starts.add(start)
+            else:
+                context_offsets.append(start)
+
+        _HS_DB.scan(body, match_event_handler=_on_match)
+        context_offsets.sort()
+        found = []
+        for s in sorted(id_starts):
+            # hyperscan reports every match end for the variable-length id
+            # pattern; re-anchor at the leftmost start and take the greedy run,
+            # rejecting starts that sit inside a longer alphanumeric run
+            if s > 0 and body[s - 1:s].isalnum():
+                continue
+            m = _ACTION_ID_FULL_RE.match(body, s)
+            if not m or body[m.end():m.end() + 1].isalnum():
+                continue
+            i = bisect.bisect_left(context_offsets, s - 400)
+            if i < len(context_offsets) and context_offsets[i] <= m.end() + 400:
+                found.append(m.group(0))
+        return found
+    if _CONTEXT_AUTOMATON is not None:
+        found = []
+        try:
+            size = len(body)
+            for end, _ in _CONTEXT_AUTOMATON.iter(body):
+                lo = max(0, end - 400)
+                hi = min(size, end + 400)
+                # widen to whole alphanumeric runs: a slice edge acts as \b,
+                # so a clipped 64-char id would otherwise yield a truncated
+                # 40+-char candidate that fullmatch happily accepts
+                while lo > 0 and body[lo - 1:lo].isalnum():
+                    lo -= 1
+                while hi < size and body[hi:hi + 1].isalnum():
+                    hi += 1
+                for m in ACTION_ID_RE.finditer(body[lo:hi]):
+                    found.append(m.group(0))
+            return found
+        except TypeError:
+            pass  # unicode-only build; fall through to the regex path
+    return [(m.group(1) or m.group(2)) for m in _CONTEXT_ID_RE.finditer(body)]
+
+def _fetch_chunk(session: requests.Session, rel: bytes):
+    url = f"{BASE_URL}{rel.decode()}"
+    try:
+        r = session.get(url, timeout=20)
+        if r.status_code == 200 and "javascript" in r.headers.get("Content-Type",""):
+            return r.content
+    except Exception:
+        pass
+    return None
+
+def discover_action_ids_for_dataset(session: requests.Session, page_html: bytes) -> list[str]:
     """
     Targeted discovery: only scan the dataset page chunk and immediate chunk scripts
     referenced in the HTML. This avoids false positives.
@@ -82,50 +269,60 @@ def discover_action_ids_for_dataset(session: requests.Session, page_html: str) -
         if srel not in prioritized:
             prioritized.append(srel)
 
+    # Fetch all chunks concurrently; the work is pure network I/O and the
+    # pooled session reuses TLS connections to the same host. ex.map preserves
+    # input order, so ids from the page chunk still come first in the output.
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        bodies = list(ex.map(lambda rel: _fetch_chunk(session, rel), prioritized))
+
     candidates = []
-    for rel in prioritized:
-        url = f"{BASE_URL}{rel}"
-        try:
-            r = session.get(url, timeout=20)
-            if r.status_code == 200 and "javascript" in r.headers.get("Content-Type",""):
-                # Heuristic: in the page chunk, action id usually appears near “next-action” usage.
-                # Narrow window: scan line-by-line; keep ids that appear on same line as words like "action","next","server","$ACTION".
-                lines = r.text.splitlines()
-                for line in lines:
-                    if ("action" in line) or ("next" in line) or ("server" in line):
-                        for m in ACTION_ID_RE.finditer(line):
-                            candidates.append(m.group(0))
-        except Exception:
-            pass
-
-    # de-dupe but keep order (page chunk ids first)
-    seen = set()
-    ordered = []
-    for x in candidates:
-        if x not in seen and re.fullmatch(r"[a-f0-9]{40,64}", x):
-            seen.add(x)
-            ordered.append(x)
-    return ordered
-
-def parse_has_agreed_from_html(html: str) -> bool:
+    for i, body in enumerate(bodies):
+        if body is None:
+            continue
+        is_page_chunk = page_chunk is not None and i == 0
+        if not is_page_chunk and len(body) > CHUNK_SCAN_MAX_BYTES:
+            continue
+        # Cheap substring gate: most chunks hold zero action ids, and a single
+        # memmem-style scan is far cheaper than starting the regex engine.
+        if b"action" not in body and b"ACTION" not in body:
+            continue
+        # Heuristic: in the page chunk, action id usually appears near “next-action” usage.
+        # Keep ids that appear near context words like "action","next","server".
+        candidates.extend(_scan_chunk_for_ids(body))
+
+    # de-dupe but keep order (page chunk ids first); decode only the survivors.
+    # dict.fromkeys does the order-preserving dedupe in C.
+    fullmatch = _ACTION_ID_FULL_RE.fullmatch
+    return [x.decode() for x in dict.fromkeys(candidates) if fullmatch(x)]
+
+def parse_has_agreed_from_html(html: bytes) -> bool:
+    # Fast path: on an already-accepted page the literal appears unescaped, so
+    # a single substring scan answers without touching the regex engine.
+    if b'"hasAgreed":true' in html:
+        return True
     m = TERMS_BLOCK_RE.search(html)
     if not m:
         # try streamed chunks too
         for cm in RSC_CHUNK_RE.finditer(html):
-            chunk = _unescape(cm.group(1))
+            raw = cm.group(1)
+            if b"hasAgreed" not in raw:
+                continue
+            chunk = _unescape(raw)
             if TERMS_BLOCK_RE.search(chunk):
                 html = chunk
                 break
         else:
             return False
     # we already matched a "... 'terms':{...}, 'hasAgreed' ..." region; just look for "hasAgreed":true
-    return '"hasAgreed":true' in html
+    return b'"hasAgreed":true' in html
 
 def accept_terms(session_token: str, dataset_id: str):
     s = requests.Session()
     s.headers.update({
         "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) Python/requests",
     })
+    # pool big enough for the concurrent chunk fetches in discovery
+    s.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
     s.cookies.set(
         "__Secure-authjs.session-token",
         session_token,
@@ -134,19 +331,22 @@ def accept_terms(session_token: str, dataset_id: str):
         secure=True,
     )
 
-    # (1) Load dataset page and extract terms + ids
+    # (1) Load dataset page (streamed) and extract terms + ids; the full HTML
+    # is still kept for the action-id discovery phase below.
     page_url = f"{BASE_URL}/datasets/{dataset_id}"
-    pr = _get(s, page_url)
-    html = pr.text
+    pr, html, early_terms = _stream_page(s, page_url)
 
-    terms_id, localization_ids, dataset_id_from_terms = extract_terms_info_from_html(html)
+    if early_terms is not None:
+        terms_id, localization_ids, dataset_id_from_terms = early_terms
+    else:
+        terms_id, localization_ids, dataset_id_from_terms = extract_terms_info_from_html(html)
     if not terms_id:
         raise RuntimeError(
             "Could not find terms.id in the page payload.\n"
             f"Content-Type: {pr.headers.get('Content-Type')}\n"
             f"URL: {page_url}\n"
             f"Status: {pr.status_code}\n"
-            f"Sample:\n{html[:1000]}"
+            f"Sample:\n{html[:1000].decode('utf-8', 'replace')}"
         )
     print(f"Found terms.id via HTML stream: {terms_id}")
     if localization_ids:
@@ -159,13 +359,14 @@ def accept_terms(session_token: str, dataset_id: str):
     if not action_ids:
         print("Warning: no action ids found in page chunk; will fall back to all chunk ids (less precise).")
         # conservative fallback: scan all chunks, but you probably won’t need this branch
-        action_ids = sorted(set(ACTION_ID_RE.findall(html)))
+        action_ids = sorted({x.decode() for x in ACTION_ID_RE.findall(html)})
 
     # (3) Prepare headers for Server Action
     tree_header = build_next_router_state_tree(dataset_id)
     base_headers = {
         "Accept": "text/x-component",
         "Content-Type": "text/plain;charset=UTF-8",
+        "Connection": "keep-alive",
         "Origin": BASE_URL,
         "Referer": page_url,
         "next-router-state-tree": tree_header,
@@ -173,20 +374,35 @@ def accept_terms(session_token: str, dataset_id: str):
     action_url = f"{BASE_URL}/datasets/{dataset_id}"
     body = json.dumps([terms_id, dataset_id])
 
-    # (4) Try each action id; after each POST, re-fetch page and verify hasAgreed == true
-    last_status = None
-    for aid in action_ids:
-        if not re.fullmatch(r"[a-f0-9]{40,64}", aid):
-            continue
+    _post = s.post  # bind once; skips an attribute lookup per candidate
+
+    def _try_action(aid: str):
         headers = dict(base_headers)
         headers["next-action"] = aid
-        try:
-            r = s.post(action_url, data=body, headers=headers, timeout=30)
+        return _post(action_url, data=body, headers=headers, timeout=30)
+
+    # (4) POST the candidate ids with bounded concurrency over the pooled
+    # session; losing candidates no longer trigger a page reload. Only a
+    # plausible winner (200 + text/x-component) pays the verification GET,
+    # and remaining candidates are cancelled once one is confirmed.
+    action_ids = [a for a in action_ids if _ACTION_ID_FULL_RE.fullmatch(a.encode())]
+    last_status = None
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        futures = {ex.submit(_try_action, aid): aid for aid in action_ids}
+        for fut in as_completed(futures):
+            aid = futures[fut]
+            try:
+                r = fut.result()
+            except Exception as e:
+                last_status = (aid, None, str(e))
+                continue
             last_status = (aid, r.status_code, r.headers.get("Content-Type",""))
             if r.status_code == 200 and "text/x-component" in r.headers.get("Content-Type",""):
                 # verify by reloading page
                 verify = _get(s, page_url)
-                if parse_has_agreed_from_html(verify.text):
+                if parse_has_agreed_from_html(verify.content):
+                    for pending in futures:
+                        pending.cancel()
                     print(f"Accepted via Server Action (next-action={aid[:12]}..., 200).")
                     # (5) Optional: confirm via download endpoint
                     dv = s.post(
@@ -201,10 +417,7 @@ def accept_terms(session_token: str, dataset_id: str):
                     else:
                         print(f"✅ Terms accepted (verified on page), but download API returned {dv.status_code}: {json_or_text(dv)}")
                     return
-                # else: false positive; try next candidate id
-        except Exception as e:
-            last_status = (aid, None, str(e))
-            continue
+                # else: false positive; keep consuming candidates
 
     aid, code, extra = last_status if last_status else ("<none>", "<no status>", "")
     raise RuntimeError(f"Failed to find the correct Server Action (last tried {aid}, status={code}, info={extra}).")
@@ -92,23 +92,29 @@ class TestDataCollective:
             client = DataCollective(api_key="param-key")
             assert client.api_key == "param-key"
 
-    @patch("mdc_dlp.client.requests.post")
-    def test_get_dataset_handles_http_error(self, mock_post):
+    def test_get_dataset_handles_http_error(self):
         """Test that get_dataset handles HTTP errors properly."""
-        # Mock a 403 Forbidden response
-        mock_response = mock_post.return_value
-        mock_response.status_code = 403
+        client = DataCollective(api_key="test-key")
 
-        # Create a proper HTTPError with response
-        http_error = requests.exceptions.HTTPError("403 Client Error: Forbidden")
-        http_error.response = mock_response
-        mock_response.raise_for_status.side_effect = http_error
+        with patch.object(client._session, "post") as mock_post:
+            # Mock a 403 Forbidden response
+            mock_response = mock_post.return_value
+            mock_response.status_code = 403
 
-        client = DataCollective(api_key="test-key")
-        result = client.get_dataset("test-dataset")
+            # Create a proper HTTPError with response
+            http_error = requests.exceptions.HTTPError("403 Client Error: Forbidden")
+            http_error.response = mock_response
+            mock_response.raise_for_status.side_effect = http_error
+
+            result = client.get_dataset("test-dataset")
 
-        assert result is None
-        mock_post.assert_called_once()
+            assert result is None
+            mock_post.assert_called_once()
+
+    def test_session_carries_authorization_header(self):
+        """Test that the pooled session is set up with the bearer token."""
+        client = DataCollective(api_key="test-key")
+        assert client._session.headers["Authorization"] == "Bearer test-key"
 
 
 class TestDataCollectiveWithMocking: